@@ -0,0 +1,88 @@
+import os
+import time
+import tempfile
+import pickle
+import numpy as np
+import face_recognition
+import sharded_gallery
+
+# Configuration
+shard_counts = [1, 2, 4, 8]
+num_identities = 20000
+encodings_per_identity = 5
+num_probes = 256
+threshold = 0.6
+
+def create_synthetic_gallery(gallery_path):
+    """Create a random gallery in the face_recognition.pickle format."""
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(num_identities, 128)) * 0.1
+    encodings = np.repeat(centers, encodings_per_identity, axis=0)
+    encodings += rng.normal(size=encodings.shape) * 0.03
+    names = [f"person_{i}" for i in range(num_identities) for _ in range(encodings_per_identity)]
+    with open(gallery_path, "wb") as f:
+        f.write(pickle.dumps({"encodings": list(encodings), "names": names}))
+    probes = encodings[rng.choice(len(encodings), num_probes, replace=False)]
+    probes = probes + rng.normal(size=probes.shape) * 0.03
+    return probes
+
+def reference_recognize(gallery_path, probes):
+    """Identify probes exactly as live_facial_recognition.py does on the full gallery."""
+    with open(gallery_path, "rb") as f:
+        data = pickle.loads(f.read())
+    known_face_encodings = data["encodings"]
+    known_face_names = data["names"]
+
+    face_names, face_distances = [], []
+    for face_encoding in probes:
+        matches = face_recognition.compare_faces(known_face_encodings, face_encoding, tolerance=threshold)
+        name = "Unknown"
+        distance = 1.0
+        distances = face_recognition.face_distance(known_face_encodings, face_encoding)
+        best_match_index = np.argmin(distances)
+        if matches[best_match_index]:
+            name = known_face_names[best_match_index]
+            distance = distances[best_match_index]
+        face_names.append(name)
+        face_distances.append(distance)
+    return face_names, face_distances
+
+def main():
+    # The gallery and shards can take hundreds of MB, so they only live for this run
+    with tempfile.TemporaryDirectory(prefix="gallery_benchmark_") as benchmark_dir:
+        run_benchmark(benchmark_dir)
+
+def run_benchmark(benchmark_dir):
+    """Benchmark every shard count against the single-process reference in benchmark_dir."""
+    gallery_path = os.path.join(benchmark_dir, "gallery.pickle")
+
+    print(f"[INFO] creating synthetic gallery of {num_identities * encodings_per_identity} encodings...")
+    probes = create_synthetic_gallery(gallery_path)
+
+    print("[INFO] computing reference results on the full gallery...")
+    start = time.perf_counter()
+    expected_names, expected_distances = reference_recognize(gallery_path, probes)
+    elapsed = time.perf_counter() - start
+    print(f"[RESULT] single process: {num_probes / elapsed:.1f} probes/s")
+
+    for num_shards in shard_counts:
+        shard_paths = sharded_gallery.create_shards(
+            num_shards, gallery_path, os.path.join(benchmark_dir, f"shards_{num_shards}"))
+        processes, addresses = sharded_gallery.start_local_workers(shard_paths)
+        connections = sharded_gallery.connect_shards(addresses)
+        try:
+            # Warm up the connections before timing
+            sharded_gallery.recognize(connections, probes[:1], threshold)
+
+            start = time.perf_counter()
+            names, _, distances = sharded_gallery.recognize(connections, probes, threshold)
+            elapsed = time.perf_counter() - start
+        finally:
+            sharded_gallery.close_shards(connections, processes)
+
+        identical = names == expected_names and distances == [float(d) for d in expected_distances]
+        print(f"[RESULT] {num_shards} shard(s): {num_probes / elapsed:.1f} probes/s, "
+              f"matches reference: {identical}")
+
+if __name__ == "__main__":
+    main()
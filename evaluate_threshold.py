@@ -0,0 +1,242 @@
+import os
+import json
+import pickle
+from imutils import paths
+import face_recognition
+import numpy as np
+import cv2
+from PIL import Image, ImageDraw, ImageFont
+
+# Configuration
+dataset_dir = "dataset"
+cache_dir = "evaluation_encodings"
+results_dir = "evaluation_results"
+detectors = ["hog"]  # "cnn" is more accurate but much slower without a GPU
+encoding_models = ["small", "large"]
+
+block_size = 1024  # rows per block, each block of distances uses block_size^2 * 8 bytes
+num_bins = 2000  # distance histogram resolution over [0, max_distance]
+max_distance = 2.0
+
+def dataset_fingerprint(image_paths):
+    """Return the sorted image paths with their sizes and modification times."""
+    fingerprint = []
+    for imagePath in sorted(image_paths):
+        stat = os.stat(imagePath)
+        fingerprint.append((imagePath, stat.st_size, stat.st_mtime_ns))
+    return fingerprint
+
+def encode_dataset(image_paths, detector):
+    """Encode every image once per encoding model, reusing face detection across models.
+
+    Cached encodings are only reused if the dataset files are unchanged since they were made.
+    """
+    fingerprint = dataset_fingerprint(image_paths)
+    cache_paths = {model: os.path.join(cache_dir, f"{detector}_{model}.pickle") for model in encoding_models}
+    results = {}
+    for model, cache_path in cache_paths.items():
+        if os.path.exists(cache_path):
+            with open(cache_path, "rb") as f:
+                cached = pickle.loads(f.read())
+            if cached.get("fingerprint") == fingerprint:
+                print(f"[INFO] loading cached encodings from {cache_path}")
+                results[model] = cached
+            else:
+                print(f"[INFO] dataset changed since {cache_path} was created, encoding again")
+    missing_models = [model for model in encoding_models if model not in results]
+    if not missing_models:
+        return results
+
+    known = {model: {"encodings": [], "names": [], "fingerprint": fingerprint} for model in missing_models}
+    for (i, imagePath) in enumerate(image_paths):
+        print(f"[INFO] encoding image {i + 1}/{len(image_paths)} ({detector})")
+        name = imagePath.split(os.path.sep)[-2]
+
+        image = cv2.imread(imagePath)
+        if image is None:
+            print(f"[WARNING] {imagePath}: could not be read, skipping.")
+            continue
+        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+        boxes = face_recognition.face_locations(rgb, model=detector)
+        # Only single-face images can be labelled reliably
+        if len(boxes) != 1:
+            print(f"[WARNING] {imagePath}: expected 1 face, found {len(boxes)}, skipping.")
+            continue
+
+        for model in missing_models:
+            encoding = face_recognition.face_encodings(rgb, boxes, model=model)[0]
+            known[model]["encodings"].append(encoding)
+            known[model]["names"].append(name)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    for model in missing_models:
+        with open(cache_paths[model], "wb") as f:
+            f.write(pickle.dumps(known[model]))
+        results[model] = known[model]
+    return results
+
+def distance_histograms(encodings, names):
+    """Histogram all genuine and impostor pair distances using memory-bounded blocks.
+
+    Only the upper triangle (i < j) of the distance matrix is visited, block by block,
+    so memory stays at one block_size x block_size matrix however many pairs there are.
+    """
+    X = np.asarray(encodings, dtype=np.float64)
+    _, labels = np.unique(np.asarray(names), return_inverse=True)
+    squared_norms = np.einsum("ij,ij->i", X, X)
+    n = len(X)
+
+    genuine = np.zeros(num_bins, dtype=np.int64)
+    impostor = np.zeros(num_bins, dtype=np.int64)
+    scale = num_bins / max_distance
+
+    for i in range(0, n, block_size):
+        Xi, ni, li = X[i:i + block_size], squared_norms[i:i + block_size], labels[i:i + block_size]
+        for j in range(i, n, block_size):
+            Xj, nj, lj = X[j:j + block_size], squared_norms[j:j + block_size], labels[j:j + block_size]
+
+            # Same Euclidean distance as face_recognition.face_distance
+            squared = ni[:, None] + nj[None, :] - 2.0 * (Xi @ Xj.T)
+            distances = np.sqrt(np.maximum(squared, 0.0))
+            same = li[:, None] == lj[None, :]
+
+            if i == j:
+                upper = np.triu(np.ones(distances.shape, dtype=bool), k=1)
+            else:
+                upper = np.ones(distances.shape, dtype=bool)
+
+            # Bin b holds distances in (b, b + 1] / scale, so a distance equal to a threshold
+            # lands in the bin that threshold accepts
+            bins = np.clip(np.ceil(distances * scale).astype(np.int64) - 1, 0, num_bins - 1)
+            genuine += np.bincount(bins[upper & same], minlength=num_bins)
+            impostor += np.bincount(bins[upper & ~same], minlength=num_bins)
+
+    return genuine, impostor
+
+def compute_rates(genuine, impostor):
+    """Return thresholds with the false accept and false reject rates at each of them."""
+    thresholds = (np.arange(num_bins) + 1) * (max_distance / num_bins)
+    # A pair is accepted when its distance is <= threshold, as in face_recognition.compare_faces
+    far = np.cumsum(impostor) / max(impostor.sum(), 1)
+    frr = 1.0 - np.cumsum(genuine) / max(genuine.sum(), 1)
+    return thresholds, far, frr
+
+def summarize(thresholds, far, frr, target_far):
+    """Find the equal error rate and the recommended threshold for the target FAR."""
+    eer_index = int(np.argmin(np.abs(far - frr)))
+    eer = (far[eer_index] + frr[eer_index]) / 2
+
+    # Most lenient threshold that still keeps the false accept rate under the target
+    allowed = np.nonzero(far <= target_far)[0]
+    summary = {
+        "eer": float(eer),
+        "eer_threshold": float(thresholds[eer_index]),
+        "target_far": target_far,
+        "recommended_threshold": None,
+        "far_at_recommended": None,
+        "frr_at_recommended": None,
+    }
+    if len(allowed):
+        recommended_index = int(allowed[-1])
+        summary["recommended_threshold"] = float(thresholds[recommended_index])
+        summary["far_at_recommended"] = float(far[recommended_index])
+        summary["frr_at_recommended"] = float(frr[recommended_index])
+    return summary
+
+def plot_curve(x, y, image_path, title, x_label, y_label, log_scale=False):
+    """Draw a simple line plot with PIL and save it."""
+    width, height, margin = 640, 480, 60
+    pil_image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(pil_image)
+    font = ImageFont.load_default()
+
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    if log_scale:
+        floor = 1e-6
+        x, y = np.log10(np.maximum(x, floor)), np.log10(np.maximum(y, floor))
+        x_min = y_min = np.log10(floor)
+    else:
+        x_min = y_min = 0.0
+    x_max = y_max = 0.0 if log_scale else 1.0
+
+    def to_pixel(px, py):
+        return (margin + (px - x_min) / (x_max - x_min) * (width - 2 * margin),
+                height - margin - (py - y_min) / (y_max - y_min) * (height - 2 * margin))
+
+    draw.rectangle([to_pixel(x_min, y_max), to_pixel(x_max, y_min)], outline="black")
+    draw.line([to_pixel(px, py) for px, py in zip(x, y)], fill="blue", width=2)
+    draw.text((margin, 20), title, fill="black", font=font)
+    draw.text((width // 2 - 40, height - 30), x_label, fill="black", font=font)
+    draw.text((5, margin - 20), y_label, fill="black", font=font)
+    low, high = ("1e-6", "1") if log_scale else ("0", "1")
+    draw.text((margin - 10, height - margin + 5), low, fill="black", font=font)
+    draw.text((width - margin - 5, height - margin + 5), high, fill="black", font=font)
+    draw.text((margin - 30, margin - 5), high, fill="black", font=font)
+    pil_image.save(image_path)
+
+def save_results(config_name, thresholds, far, frr, summary):
+    """Save the rate table, ROC and DET curves and the summary of one configuration."""
+    config_dir = os.path.join(results_dir, config_name)
+    os.makedirs(config_dir, exist_ok=True)
+
+    with open(os.path.join(config_dir, "rates.csv"), "w") as f:
+        f.write("threshold,far,frr\n")
+        for threshold, fa, fr in zip(thresholds, far, frr):
+            f.write(f"{threshold:.4f},{fa:.8f},{fr:.8f}\n")
+
+    plot_curve(far, 1 - frr, os.path.join(config_dir, "roc.png"),
+               f"ROC {config_name}", "False accept rate", "True accept rate")
+    plot_curve(far, frr, os.path.join(config_dir, "det.png"),
+               f"DET {config_name} (log scale)", "False accept rate", "False reject rate", log_scale=True)
+
+    with open(os.path.join(config_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=4)
+    print(f"[INFO] Results saved to {config_dir}")
+
+def main():
+    target_far = input("Enter the target false accept rate (default 0.001): ").strip()
+    target_far = float(target_far) if target_far else 0.001
+
+    image_paths = list(paths.list_images(dataset_dir))
+    if not image_paths:
+        print(f"[ERROR] No images found in {dataset_dir}.")
+        return
+
+    summaries = {}
+    for detector in detectors:
+        encoded = encode_dataset(image_paths, detector)
+        for model in encoding_models:
+            config_name = f"{detector}_{model}"
+            encodings, names = encoded[model]["encodings"], encoded[model]["names"]
+            if len(set(names)) < 2:
+                print(f"[ERROR] {config_name}: at least two people are needed for impostor pairs.")
+                continue
+
+            print(f"[INFO] {config_name}: computing distances for {len(encodings)} encodings...")
+            genuine, impostor = distance_histograms(encodings, names)
+            if genuine.sum() == 0:
+                print(f"[ERROR] {config_name}: no genuine pairs, at least one person needs two usable images.")
+                continue
+            thresholds, far, frr = compute_rates(genuine, impostor)
+            summary = summarize(thresholds, far, frr, target_far)
+            summary["genuine_pairs"] = int(genuine.sum())
+            summary["impostor_pairs"] = int(impostor.sum())
+            save_results(config_name, thresholds, far, frr, summary)
+            summaries[config_name] = summary
+
+            print(f"[RESULT] {config_name}: EER {summary['eer'] * 100:.2f}% at {summary['eer_threshold']:.3f}")
+            if summary["recommended_threshold"] is None:
+                print(f"[WARNING] {config_name}: no threshold reaches the target FAR of {target_far}, "
+                      f"no threshold recommended.")
+            else:
+                print(f"[RESULT] {config_name}: recommended threshold {summary['recommended_threshold']:.3f} "
+                      f"(FAR {summary['far_at_recommended'] * 100:.3f}%, FRR {summary['frr_at_recommended'] * 100:.2f}%)")
+
+    if summaries:
+        os.makedirs(results_dir, exist_ok=True)
+        with open(os.path.join(results_dir, "summary.json"), "w") as f:
+            json.dump(summaries, f, indent=4)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import cv2
+import face_recognition
+import hashlib
+import json
+import numpy as np
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+# Directory for results saved on demand
+results_dir = "qr_gate_results"
+
+# Initialize our variables
+cv_scaler = 4  # this has to be a whole number
+verify_frames = 5  # number of frames to look for a matching face after a QR code is seen
+cooldown_seconds = 3.0  # ignore the same QR code for this long after a decision
+qr_cache_size = 256  # most recently seen QR payloads kept decoded
+
+# Decoded QR payloads keyed by the SHA-256 of their content, least recently seen first
+qr_cache = OrderedDict()
+
+def scan_qr_code(detector, frame):
+    """Detect and decode a QR code in the frame in-process, returning its payload or None."""
+    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    data, points, _ = detector.detectAndDecode(gray_frame)
+    if not data:
+        return None, None
+    return data, points
+
+def load_biometric_data_cached(data):
+    """Load biometric encodings from the QR payload, parsing each distinct payload only once."""
+    key = hashlib.sha256(data.encode("utf-8")).hexdigest()
+    if key in qr_cache:
+        qr_cache.move_to_end(key)
+    else:
+        try:
+            biometric_data = json.loads(data)
+            encodings = np.array([entry["face_encoding"] for entry in biometric_data], dtype=np.float64)
+        except (ValueError, KeyError, TypeError):
+            encodings = None
+        # Any QR code can be held up to the gate, so only accept well-formed face encodings
+        if encodings is None or encodings.ndim != 2 or encodings.shape[0] < 1 or encodings.shape[1] != 128:
+            print(f"[WARNING] QR code {key[:12]} does not contain biometric data, ignoring it.")
+            encodings = None
+        else:
+            print(f"[INFO] New QR code {key[:12]} with {len(encodings)} face encoding(s) cached.")
+        qr_cache[key] = encodings
+        # Anyone can show QR codes to the gate, so keep the cache bounded
+        if len(qr_cache) > qr_cache_size:
+            qr_cache.popitem(last=False)
+    return key, qr_cache[key]
+
+def match_frame(frame, known_encodings):
+    """Return the face locations in the frame and the smallest distance to the QR encodings."""
+    resized_frame = cv2.resize(frame, (0, 0), fx=(1/cv_scaler), fy=(1/cv_scaler))
+    rgb_resized_frame = cv2.cvtColor(resized_frame, cv2.COLOR_BGR2RGB)
+
+    face_locations = face_recognition.face_locations(rgb_resized_frame, model="hog")
+    face_encodings = face_recognition.face_encodings(rgb_resized_frame, face_locations)
+
+    best_distance = None
+    for face_encoding in face_encodings:
+        distances = face_recognition.face_distance(known_encodings, face_encoding)
+        distance = float(np.min(distances))
+        if best_distance is None or distance < best_distance:
+            best_distance = distance
+    return face_locations, best_distance
+
+def emit_event(events, session, result, threshold):
+    """Record and print an accept/reject decision for the current session."""
+    latency_ms = (time.perf_counter() - session["started"]) * 1000
+    event = {
+        "time": datetime.now().isoformat(timespec="milliseconds"),
+        "qr_hash": session["key"],
+        "result": result,
+        "distance": session["best_distance"],
+        "threshold": threshold,
+        "frames": session["frames"],
+        "latency_ms": round(latency_ms, 1),
+    }
+    events.append(event)
+    distance_text = "n/a" if event["distance"] is None else f"{event['distance']:.4f}"
+    print(f"[{result.upper()}] QR {session['key'][:12]} distance: {distance_text} "
+          f"frames: {session['frames']} latency: {event['latency_ms']:.1f} ms")
+    return event
+
+def draw_results(frame, face_locations, qr_points, status, color):
+    """Draw the QR outline, face boxes and gate status on the frame."""
+    if qr_points is not None:
+        cv2.polylines(frame, [np.int32(qr_points).reshape(-1, 1, 2)], True, (255, 0, 0), 2)
+
+    for (top, right, bottom, left) in face_locations:
+        # Scale back up face locations since the frame we detected in was scaled
+        top *= cv_scaler
+        right *= cv_scaler
+        bottom *= cv_scaler
+        left *= cv_scaler
+        cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
+
+    cv2.putText(frame, status, (10, 30), cv2.FONT_HERSHEY_DUPLEX, 0.8, color, 2)
+    return frame
+
+def save_results(frame, events):
+    """Save the current annotated frame and the event log, only when requested."""
+    os.makedirs(results_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    image_path = os.path.join(results_dir, f"gate_{timestamp}.jpg")
+    cv2.imwrite(image_path, frame)
+    events_path = os.path.join(results_dir, f"gate_events_{timestamp}.json")
+    with open(events_path, "w") as json_file:
+        json.dump(events, json_file, indent=4)
+    print(f"[INFO] Frame saved to {image_path}, {len(events)} event(s) saved to {events_path}")
+
+def main():
+    threshold = float(input("Enter the face recognition threshold (e.g., 0.6): ").strip())
+
+    cap = cv2.VideoCapture(0)
+    if not cap.isOpened():
+        raise IOError("Cannot open webcam")
+
+    detector = cv2.QRCodeDetector()
+    events = []
+    session = None
+    last_decision = {}  # QR hash -> time of the last decision, used for the cooldown
+    status, color = "Show QR code", (255, 255, 255)
+
+    print("[INFO] Gate running. Press 's' to save the current frame and events, 'q' to quit.")
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            print("Failed to grab frame")
+            break
+
+        face_locations = []
+        qr_points = None
+
+        if session is None:
+            data, qr_points = scan_qr_code(detector, frame)
+            if data:
+                key, known_encodings = load_biometric_data_cached(data)
+                now = time.perf_counter()
+                if known_encodings is not None and now - last_decision.get(key, -cooldown_seconds) >= cooldown_seconds:
+                    session = {"key": key, "encodings": known_encodings, "started": now,
+                               "frames": 0, "best_distance": None}
+                    status, color = "Verifying...", (0, 255, 255)
+        else:
+            face_locations, distance = match_frame(frame, session["encodings"])
+            session["frames"] += 1
+            if distance is not None and (session["best_distance"] is None or distance < session["best_distance"]):
+                session["best_distance"] = distance
+
+            result = None
+            if distance is not None and distance <= threshold:
+                result = "accept"
+                status, color = f"ACCEPT ({distance:.4f})", (0, 255, 0)
+            elif session["frames"] >= verify_frames:
+                result = "reject"
+                status, color = "REJECT", (0, 0, 255)
+
+            if result:
+                emit_event(events, session, result, threshold)
+                now = time.perf_counter()
+                # Forget QR codes whose cooldown is over so the dict stays small on a long-running gate
+                last_decision = {qr_key: decided for qr_key, decided in last_decision.items()
+                                 if now - decided < cooldown_seconds}
+                last_decision[session["key"]] = now
+                session = None
+
+        display_frame = draw_results(frame, face_locations, qr_points, status, color)
+        cv2.imshow('QR Gate', display_frame)
+
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord('s'):
+            save_results(display_frame, events)
+        elif key == ord('q'):
+            break
+
+    cap.release()
+    cv2.destroyAllWindows()
+    accepted = sum(1 for event in events if event["result"] == "accept")
+    print(f"[INFO] Gate stopped. {accepted} accepted, {len(events) - accepted} rejected.")
+
+if __name__ == "__main__":
+    main()
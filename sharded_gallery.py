@@ -0,0 +1,269 @@
+import os
+import hashlib
+import ipaddress
+import pickle
+import secrets
+import numpy as np
+import multiprocessing as mp
+from multiprocessing.connection import Listener, Client, AuthenticationError
+
+# Configuration
+gallery_path = "face_recognition.pickle"
+shard_dir = "gallery_shards"
+
+def gallery_authkey():
+    """Return the shared key from the GALLERY_AUTHKEY environment variable, or None if unset."""
+    key = os.environ.get("GALLERY_AUTHKEY")
+    return key.encode("utf-8") if key else None
+
+def default_authkey():
+    """Return GALLERY_AUTHKEY if set, otherwise this process's random multiprocessing authkey."""
+    return gallery_authkey() or mp.current_process().authkey
+
+def is_loopback(host):
+    """Return True if the host only accepts connections from this machine."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def shard_of(name, num_shards):
+    """Return the shard index of an identity, stable across processes and machines."""
+    digest = hashlib.md5(name.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % num_shards
+
+def create_shards(num_shards, source_path=gallery_path, output_dir=shard_dir):
+    """Split the gallery pickle into shards by hash of identity.
+
+    Each shard keeps the original position of its encodings in "indices" so that
+    merged results can break distance ties exactly like np.argmin on the full gallery.
+    """
+    with open(source_path, "rb") as f:
+        data = pickle.loads(f.read())
+
+    shards = [{"encodings": [], "names": [], "indices": []} for _ in range(num_shards)]
+    for index, (encoding, name) in enumerate(zip(data["encodings"], data["names"])):
+        shard = shards[shard_of(name, num_shards)]
+        shard["encodings"].append(encoding)
+        shard["names"].append(name)
+        shard["indices"].append(index)
+
+    os.makedirs(output_dir, exist_ok=True)
+    shard_paths = []
+    for i, shard in enumerate(shards):
+        shard_path = os.path.join(output_dir, f"shard_{i}_of_{num_shards}.pickle")
+        with open(shard_path, "wb") as f:
+            f.write(pickle.dumps(shard))
+        print(f"[INFO] shard {i}: {len(shard['names'])} encodings saved to {shard_path}")
+        shard_paths.append(shard_path)
+    return shard_paths
+
+def load_shard(shard_path):
+    """Load a shard pickle into arrays ready for querying."""
+    with open(shard_path, "rb") as f:
+        shard = pickle.loads(f.read())
+    encodings = np.array(shard["encodings"], dtype=np.float64).reshape(-1, 128)
+    return encodings, list(shard["names"]), np.array(shard["indices"], dtype=np.int64)
+
+def query_shard(encodings, names, indices, probes, k):
+    """Return the k nearest gallery entries of this shard for each probe.
+
+    Distances are computed exactly like face_recognition.face_distance, and ties are
+    ordered by original gallery index, so merging shards reproduces np.argmin.
+    """
+    k = min(k, len(indices))
+    top_distances = np.empty((len(probes), k), dtype=np.float64)
+    top_indices = np.empty((len(probes), k), dtype=np.int64)
+    top_names = []
+    if k == 0:
+        return top_distances, top_indices, [[] for _ in probes]
+    for row, probe in enumerate(probes):
+        distances = np.linalg.norm(encodings - probe, axis=1)
+        # Keep everything up to the k-th smallest distance (ties included), then sort only those
+        kth_distance = np.partition(distances, k - 1)[k - 1]
+        candidates = np.nonzero(distances <= kth_distance)[0]
+        order = candidates[np.lexsort((indices[candidates], distances[candidates]))[:k]]
+        top_distances[row] = distances[order]
+        top_indices[row] = indices[order]
+        top_names.append([names[i] for i in order])
+    return top_distances, top_indices, top_names
+
+def serve_shard(shard_path, address, authkey, ready=None):
+    """Serve queries for one shard on a socket until the coordinator sends "close".
+
+    Messages are unpickled, so only clients holding authkey may connect.
+    """
+    if not authkey:
+        raise ValueError("An authkey is required to serve a shard.")
+    encodings, names, indices = load_shard(shard_path)
+    with Listener(address, authkey=authkey) as listener:
+        if ready is not None:
+            ready.send(listener.address)
+        print(f"[INFO] shard {shard_path} ({len(names)} encodings) listening on {listener.address}")
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError, OSError) as e:
+                print(f"[WARNING] rejected connection: {e}")
+                continue
+            with conn:
+                while True:
+                    try:
+                        message = conn.recv()
+                    except EOFError:
+                        break
+                    # Always answer, so the coordinator never waits forever on a bad request
+                    if isinstance(message, tuple) and message and message[0] == "close":
+                        return
+                    if isinstance(message, tuple) and len(message) == 3 and message[0] == "query":
+                        _, probes, k = message
+                        try:
+                            conn.send(("result",) + query_shard(encodings, names, indices, probes, k))
+                        except Exception as e:
+                            conn.send(("error", f"query failed: {e}"))
+                    else:
+                        conn.send(("error", f"unknown message: {message!r:.100}"))
+
+def start_local_workers(shard_paths):
+    """Start one worker process per shard on localhost and return processes and addresses.
+
+    Workers are authenticated with GALLERY_AUTHKEY if set, otherwise with this
+    process's random multiprocessing authkey.
+    """
+    authkey = default_authkey()
+    processes, addresses = [], []
+    for shard_path in shard_paths:
+        parent_conn, child_conn = mp.Pipe()
+        process = mp.Process(target=serve_shard, args=(shard_path, ("localhost", 0), authkey, child_conn),
+                             daemon=True)
+        process.start()
+        processes.append(process)
+        # Only the child holds the other end now, so recv() fails instead of hanging if it dies
+        child_conn.close()
+        try:
+            addresses.append(parent_conn.recv())
+        except EOFError:
+            for started in processes:
+                started.terminate()
+                started.join()
+            raise RuntimeError(f"Shard worker for {shard_path} exited before it started listening.")
+        finally:
+            parent_conn.close()
+    return processes, addresses
+
+def connect_shards(addresses, authkey=None):
+    """Connect the coordinator to every shard worker.
+
+    Without an authkey, GALLERY_AUTHKEY is used if set, otherwise the key of local
+    workers from start_local_workers.
+    """
+    if authkey is None:
+        authkey = default_authkey()
+    return [Client(tuple(address), authkey=authkey) for address in addresses]
+
+def close_shards(connections, processes=()):
+    """Ask every shard worker to stop and wait for local worker processes."""
+    for conn in connections:
+        conn.send(("close",))
+        conn.close()
+    for process in processes:
+        process.join()
+
+def query_gallery(connections, probes, k=1):
+    """Fan a batch of probe encodings out to all shards and merge their top-k by distance."""
+    probes = np.asarray(probes, dtype=np.float64).reshape(-1, 128)
+    # Send to every shard first so they all work in parallel, then collect
+    for conn in connections:
+        conn.send(("query", probes, k))
+    replies = [conn.recv() for conn in connections]
+    for reply in replies:
+        if reply[0] == "error":
+            raise RuntimeError(f"Shard worker error: {reply[1]}")
+
+    merged = []
+    for row in range(len(probes)):
+        distances = np.concatenate([reply[1][row] for reply in replies])
+        indices = np.concatenate([reply[2][row] for reply in replies])
+        row_names = [name for reply in replies for name in reply[3][row]]
+        order = np.lexsort((indices, distances))[:k]
+        merged.append([(row_names[i], float(distances[i]), int(indices[i])) for i in order])
+    return merged
+
+def recognize(connections, probes, threshold):
+    """Identify probe encodings with the same rules as live_facial_recognition.py.
+
+    The closest gallery entry wins and is accepted only if its distance is within the
+    threshold, otherwise the face is "Unknown" with distance 1.0 and 0% probability.
+    """
+    face_names, face_percentages, face_distances = [], [], []
+    for candidates in query_gallery(connections, probes, k=1):
+        name = "Unknown"
+        percentage = 0.0
+        distance = 1.0
+        if candidates and candidates[0][1] <= threshold:
+            name, distance = candidates[0][0], candidates[0][1]
+            percentage = (1 - distance) * 100
+        face_names.append(name)
+        face_percentages.append(percentage)
+        face_distances.append(distance)
+    return face_names, face_percentages, face_distances
+
+def main():
+    print("Choose an option:")
+    print("1. Split the gallery into shards")
+    print("2. Serve a shard")
+    print("3. Recognize probe encodings with shard workers")
+    choice = input("Enter 1, 2 or 3: ")
+
+    if choice == "1":
+        num_shards = int(input("Enter the number of shards: ").strip())
+        create_shards(num_shards)
+    elif choice == "2":
+        shard_path = input("Enter the path to the shard file: ").strip()
+        host = input("Enter the host to listen on (default localhost): ").strip() or "localhost"
+        port = int(input("Enter the port to listen on: ").strip())
+
+        authkey = gallery_authkey()
+        if authkey is None:
+            if not is_loopback(host):
+                print("[ERROR] Set GALLERY_AUTHKEY before serving a shard on a non-loopback host.")
+                return
+            key = secrets.token_hex(32)
+            authkey = key.encode("utf-8")
+            print(f"[INFO] GALLERY_AUTHKEY is not set, use this key for the coordinator: {key}")
+        serve_shard(shard_path, (host, port), authkey)
+    elif choice == "3":
+        workers = input("Enter the shard workers as host:port, separated by commas: ").strip()
+        probe_path = input("Enter the path to the probe encodings pickle: ").strip()
+        threshold = float(input("Enter the threshold for face recognition (e.g., 0.6): ").strip())
+
+        authkey = gallery_authkey()
+        if authkey is None:
+            print("[ERROR] Set GALLERY_AUTHKEY to the key of the shard workers.")
+            return
+        addresses = []
+        for worker in workers.split(","):
+            host, _, port = worker.strip().rpartition(":")
+            addresses.append((host, int(port)))
+
+        # Same format as face_recognition.pickle, "names" is optional
+        with open(probe_path, "rb") as f:
+            probe_data = pickle.loads(f.read())
+        probe_names = probe_data.get("names", [None] * len(probe_data["encodings"]))
+
+        connections = connect_shards(addresses, authkey)
+        try:
+            names, percentages, distances = recognize(connections, probe_data["encodings"], threshold)
+        finally:
+            for conn in connections:
+                conn.close()
+        for i, (name, percentage, distance, expected) in enumerate(zip(names, percentages, distances, probe_names)):
+            expected_text = f" (expected {expected})" if expected is not None else ""
+            print(f"[RESULT] probe {i + 1}: {name} ({percentage:.2f}%) distance: {distance:.4f}{expected_text}")
+    else:
+        print("Invalid choice.")
+
+if __name__ == "__main__":
+    main()